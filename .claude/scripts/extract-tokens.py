@@ -14,6 +14,7 @@ import re
 import sys
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 # Haiku pricing (per 1M tokens)
 HAIKU_INPUT_PRICE = 0.80  # $0.80 per 1M input tokens
@@ -25,78 +26,132 @@ HAIKU_CACHE_WRITE_PRICE = 1.00  # $1.00 per 1M (25% premium)
 OPUS_INPUT_PRICE = 15.00
 OPUS_OUTPUT_PRICE = 75.00
 
+# Per-token prices, derived once from the per-1M prices above
+_HAIKU_PER_TOKEN = (
+    HAIKU_INPUT_PRICE / 1_000_000,
+    HAIKU_OUTPUT_PRICE / 1_000_000,
+    HAIKU_CACHE_READ_PRICE / 1_000_000,
+    HAIKU_CACHE_WRITE_PRICE / 1_000_000,
+)
+_OPUS_PER_TOKEN = (
+    OPUS_INPUT_PRICE / 1_000_000,
+    OPUS_OUTPUT_PRICE / 1_000_000,
+)
+
+# Optional fast path for transcript line parsing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Transcripts can be hundreds of MB; read them in large chunks
+READ_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+# Below this many transcripts, process pool startup costs more than it saves
+POOL_MIN_TRANSCRIPTS = 32
+
+_ISSUE_RE = re.compile(r'#(\d+)')
+
+
+def _loads(line: bytes):
+    """Parse a transcript line, with orjson when installed.
+
+    orjson is stricter than the stdlib (e.g. it rejects lone surrogate escapes
+    left by truncated emoji), so lines it refuses are retried with json.loads
+    and results never depend on whether orjson is installed. Raises ValueError
+    (JSONDecodeError, or UnicodeDecodeError on invalid UTF-8) on malformed lines.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line)
+
 
 def calculate_cost(tokens: dict, model: str = "haiku") -> float:
     """Calculate cost in USD based on token counts."""
     if model == "haiku":
-        input_cost = tokens["input_tokens"] * HAIKU_INPUT_PRICE / 1_000_000
-        output_cost = tokens["output_tokens"] * HAIKU_OUTPUT_PRICE / 1_000_000
-        cache_read_cost = tokens["cache_read_input_tokens"] * HAIKU_CACHE_READ_PRICE / 1_000_000
-        cache_write_cost = tokens["cache_creation_input_tokens"] * HAIKU_CACHE_WRITE_PRICE / 1_000_000
-        return input_cost + output_cost + cache_read_cost + cache_write_cost
+        input_price, output_price, cache_read_price, cache_write_price = _HAIKU_PER_TOKEN
+        return (
+            tokens["input_tokens"] * input_price +
+            tokens["output_tokens"] * output_price +
+            tokens["cache_read_input_tokens"] * cache_read_price +
+            tokens["cache_creation_input_tokens"] * cache_write_price
+        )
     else:  # opus
         total_input = (
             tokens["input_tokens"] +
             tokens["cache_creation_input_tokens"] +
             tokens["cache_read_input_tokens"]
         )
-        input_cost = total_input * OPUS_INPUT_PRICE / 1_000_000
-        output_cost = tokens["output_tokens"] * OPUS_OUTPUT_PRICE / 1_000_000
-        return input_cost + output_cost
+        input_price, output_price = _OPUS_PER_TOKEN
+        return total_input * input_price + tokens["output_tokens"] * output_price
 
 
 def extract_issue_number(task: str) -> str:
     """Extract issue number from task description."""
-    match = re.search(r'#(\d+)', task)
+    match = _ISSUE_RE.search(task)
     return match.group(1) if match else ""
 
 
-def extract_tokens_from_file(filepath: Path) -> dict:
-    """Extract token counts from a JSONL transcript file."""
+def add_usage(totals: dict, data: dict) -> None:
+    """Add the message usage counters of a transcript entry to totals."""
+    if "message" in data and "usage" in data["message"]:
+        usage = data["message"]["usage"]
+        totals["input_tokens"] += usage.get("input_tokens", 0)
+        totals["output_tokens"] += usage.get("output_tokens", 0)
+        totals["cache_creation_input_tokens"] += usage.get("cache_creation_input_tokens", 0)
+        totals["cache_read_input_tokens"] += usage.get("cache_read_input_tokens", 0)
+
+
+def get_agent_info(data: dict) -> dict:
+    """Get metadata from the first entry of a transcript."""
+    info = {}
+    info["session_id"] = data.get("sessionId", "unknown")
+    info["agent_id"] = data.get("agentId")
+    info["slug"] = data.get("slug", "")
+    info["git_branch"] = data.get("gitBranch", "")
+    # Extract prompt from user message
+    if "message" in data and data["message"].get("role") == "user":
+        content = data["message"].get("content", "")
+        if isinstance(content, str):
+            # Extract first line or issue reference
+            first_line = content.split('\n')[0][:100]
+            info["task"] = first_line
+    return info
+
+
+def extract_tokens_and_info(filepath: Path) -> tuple:
+    """Extract token counts and agent metadata from a JSONL transcript file in one pass."""
     totals = {
         "input_tokens": 0,
         "output_tokens": 0,
         "cache_creation_input_tokens": 0,
         "cache_read_input_tokens": 0,
     }
+    info = {}
+
+    # Binary mode: lines are probed and decoded as bytes, skipping text decoding
+    with open(filepath, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        # The first line holds the agent metadata and may carry usage as well
+        try:
+            data = _loads(f.readline())
+            info = get_agent_info(data)
+            add_usage(totals, data)
+        except ValueError:
+            pass
 
-    with open(filepath, 'r') as f:
         for line in f:
+            # Most lines carry no usage block; skip them without decoding
+            if b'"usage"' not in line:
+                continue
             try:
-                data = json.loads(line)
-                if "message" in data and "usage" in data["message"]:
-                    usage = data["message"]["usage"]
-                    totals["input_tokens"] += usage.get("input_tokens", 0)
-                    totals["output_tokens"] += usage.get("output_tokens", 0)
-                    totals["cache_creation_input_tokens"] += usage.get("cache_creation_input_tokens", 0)
-                    totals["cache_read_input_tokens"] += usage.get("cache_read_input_tokens", 0)
-            except json.JSONDecodeError:
+                add_usage(totals, _loads(line))
+            except ValueError:
                 continue
 
-    return totals
-
-
-def get_agent_info(filepath: Path) -> dict:
-    """Get metadata from first line of transcript."""
-    info = {}
-    with open(filepath, 'r') as f:
-        first_line = f.readline()
-        try:
-            data = json.loads(first_line)
-            info["session_id"] = data.get("sessionId", "unknown")
-            info["agent_id"] = data.get("agentId")
-            info["slug"] = data.get("slug", "")
-            info["git_branch"] = data.get("gitBranch", "")
-            # Extract prompt from user message
-            if "message" in data and data["message"].get("role") == "user":
-                content = data["message"].get("content", "")
-                if isinstance(content, str):
-                    # Extract first line or issue reference
-                    first_line = content.split('\n')[0][:100]
-                    info["task"] = first_line
-        except json.JSONDecodeError:
-            pass
-    return info
+    return totals, info
 
 
 def format_github_comment(agent_id: str, tokens: dict, info: dict) -> str:
@@ -120,35 +175,34 @@ Branch: `{info.get('git_branch', 'unknown')}`"""
 
 
 def scan_session_dir(session_dir: Path):
-    """Scan a session directory for all transcripts."""
+    """Find all transcripts of a session; the caller fills in tokens and info."""
     results = []
 
     # Main session transcript
     session_id = session_dir.name
     main_transcript = session_dir.parent / f"{session_id}.jsonl"
     if main_transcript.exists():
-        tokens = extract_tokens_from_file(main_transcript)
-        info = get_agent_info(main_transcript)
         results.append({
             "type": "main",
             "path": main_transcript,
-            "tokens": tokens,
-            "info": info,
         })
 
     # Subagent transcripts
     subagents_dir = session_dir / "subagents"
     if subagents_dir.exists():
-        for agent_file in sorted(subagents_dir.glob("agent-*.jsonl")):
-            tokens = extract_tokens_from_file(agent_file)
-            info = get_agent_info(agent_file)
+        # scandir entries carry their file type, so filtering needs no extra stat calls
+        with os.scandir(subagents_dir) as entries:
+            agent_names = sorted(
+                entry.name for entry in entries
+                if entry.name.startswith("agent-") and entry.name.endswith(".jsonl") and entry.is_file()
+            )
+        for name in agent_names:
+            agent_file = subagents_dir / name
             agent_id = agent_file.stem.replace("agent-", "")
             results.append({
                 "type": "subagent",
                 "agent_id": agent_id,
                 "path": agent_file,
-                "tokens": tokens,
-                "info": info,
             })
 
     return results
@@ -164,8 +218,7 @@ def main():
         path = Path(args[0])
         if path.suffix == ".jsonl":
             # Single file
-            tokens = extract_tokens_from_file(path)
-            info = get_agent_info(path)
+            tokens, info = extract_tokens_and_info(path)
             agent_id = path.stem.replace("agent-", "") if "agent-" in path.stem else "main"
             print(format_github_comment(agent_id, tokens, info))
             return
@@ -178,9 +231,10 @@ def main():
 
     # Find all session directories (those with subagents subdirectory)
     sessions = []
-    for item in sorted(project_dir.iterdir()):
-        if item.is_dir() and (item / "subagents").exists():
-            sessions.append(item)
+    with os.scandir(project_dir) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, "subagents")):
+                sessions.append(Path(entry.path))
 
     if not sessions:
         print("No sessions with subagents found.")
@@ -189,13 +243,28 @@ def main():
     # Collect all subagent data for summary
     all_subagents = []
 
-    for session_dir in sessions:
-        results = scan_session_dir(session_dir)
-
+    # Find every transcript first, then parse them in parallel: JSON decoding
+    # is CPU-bound, so worker processes sidestep the GIL. Small batches (or a
+    # single CPU) are parsed in-process, where pool startup would dominate.
+    scanned = [(session_dir, scan_session_dir(session_dir)) for session_dir in sessions]
+    pending = [result for _, results in scanned for result in results]
+    paths = [result["path"] for result in pending]
+    if len(paths) < POOL_MIN_TRANSCRIPTS or (os.cpu_count() or 1) == 1:
+        extracted = [extract_tokens_and_info(path) for path in paths]
+    else:
+        with ProcessPoolExecutor() as executor:
+            extracted = list(executor.map(extract_tokens_and_info, paths))
+    for result, (tokens, info) in zip(pending, extracted):
+        result["tokens"] = tokens
+        result["info"] = info
+
+    for session_dir, results in scanned:
         if not summary_only:
-            print(f"\n{'='*70}")
-            print(f"Session: {session_dir.name}")
-            print("=" * 70)
+            sys.stdout.write("\n".join([
+                f"\n{'='*70}",
+                f"Session: {session_dir.name}",
+                "=" * 70,
+            ]) + "\n")
 
         for result in results:
             tokens = result["tokens"]
@@ -228,34 +297,43 @@ def main():
                 })
 
                 if not summary_only:
-                    print(f"\n  Subagent {agent_id}")
-                    print(f"    Issue: #{issue}" if issue else "    Issue: N/A")
-                    print(f"    Branch: {branch}")
-                    print(f"    Task: {task[:60]}...")
-                    print(f"    Input:  {total_input:>10,} (direct: {tokens['input_tokens']:,}, cache create: {tokens['cache_creation_input_tokens']:,}, cache read: {tokens['cache_read_input_tokens']:,})")
-                    print(f"    Output: {tokens['output_tokens']:>10,}")
-                    print(f"    Total:  {total:>10,}")
-                    print(f"    Haiku cost: ${haiku_cost:.4f}  (Opus would be: ${opus_cost:.2f})")
-
-    # Print summary table
-    print("\n" + "=" * 90)
-    print("SUMMARY: SUBAGENT TOKEN USAGE")
-    print("=" * 90)
-    print(f"{'Issue':<8} {'Agent':<10} {'Output':<10} {'Total':<12} {'Haiku $':<10} {'Opus $':<10} {'Saved':<10}")
-    print("-" * 90)
+                    sys.stdout.write("\n".join([
+                        f"\n  Subagent {agent_id}",
+                        f"    Issue: #{issue}" if issue else "    Issue: N/A",
+                        f"    Branch: {branch}",
+                        f"    Task: {task[:60]}...",
+                        f"    Input:  {total_input:>10,} (direct: {tokens['input_tokens']:,}, cache create: {tokens['cache_creation_input_tokens']:,}, cache read: {tokens['cache_read_input_tokens']:,})",
+                        f"    Output: {tokens['output_tokens']:>10,}",
+                        f"    Total:  {total:>10,}",
+                        f"    Haiku cost: ${haiku_cost:.4f}  (Opus would be: ${opus_cost:.2f})",
+                    ]) + "\n")
+
+    # Build the summary table and write it out in one go
+    out = [
+        "\n" + "=" * 90,
+        "SUMMARY: SUBAGENT TOKEN USAGE",
+        "=" * 90,
+        f"{'Issue':<8} {'Agent':<10} {'Output':<10} {'Total':<12} {'Haiku $':<10} {'Opus $':<10} {'Saved':<10}",
+        "-" * 90,
+    ]
 
     total_haiku = 0
     total_opus = 0
-    for sa in sorted(all_subagents, key=lambda x: x["issue"] or "999"):
-        issue = f"#{sa['issue']}" if sa['issue'] else "N/A"
-        print(f"{issue:<8} {sa['agent_id']:<10} {sa['tokens']['output_tokens']:<10,} {sa['total_tokens']:<12,} ${sa['haiku_cost']:<9.4f} ${sa['opus_cost']:<9.2f} ${sa['savings']:.2f}")
-        total_haiku += sa['haiku_cost']
-        total_opus += sa['opus_cost']
-
-    print("-" * 90)
+    all_subagents.sort(key=lambda x: x["issue"] or "999")
+    for sa in all_subagents:
+        issue = sa['issue']
+        issue = f"#{issue}" if issue else "N/A"
+        haiku_cost = sa['haiku_cost']
+        opus_cost = sa['opus_cost']
+        out.append(f"{issue:<8} {sa['agent_id']:<10} {sa['tokens']['output_tokens']:<10,} {sa['total_tokens']:<12,} ${haiku_cost:<9.4f} ${opus_cost:<9.2f} ${sa['savings']:.2f}")
+        total_haiku += haiku_cost
+        total_opus += opus_cost
+
+    out.append("-" * 90)
     savings_pct = (1 - total_haiku / total_opus) * 100 if total_opus > 0 else 0
-    print(f"{'TOTAL':<8} {'':<10} {'':<10} {'':<12} ${total_haiku:<9.2f} ${total_opus:<9.2f} ${total_opus - total_haiku:.2f} ({savings_pct:.0f}%)")
-    print("=" * 90)
+    out.append(f"{'TOTAL':<8} {'':<10} {'':<10} {'':<12} ${total_haiku:<9.2f} ${total_opus:<9.2f} ${total_opus - total_haiku:.2f} ({savings_pct:.0f}%)")
+    out.append("=" * 90)
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
@@ -14,31 +14,59 @@ Args:
     max_records: Maximum number of records to add (default: 5)
 """
 
+import base64
+import http.client
 import json
-import re
-import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+# Optional: with httpx and h2 installed, all workers share one HTTP/2
+# connection and multiplex their PUTs over it
+try:
+    import h2  # noqa: F401 -- required by httpx for http2=True
+    import httpx
+except ImportError:
+    httpx = None
+
+# Number of record adds in flight at once
+MAX_WORKERS = 8
+
+# Decoder for scan results; strict=False tolerates raw control characters
+# that end up inside string values in curl logs
+SCAN_DECODER = json.JSONDecoder(strict=False)
+
+# Keep-alive connections to the API, one set per worker thread
+# (http.client connections are not thread-safe), keyed by host
+_local = threading.local()
+
+# Shared HTTP/2 client (httpx.Client is thread-safe), created on first use
+_http2_client = None
+_http2_lock = threading.Lock()
+
+
+@dataclass
+class AddResult:
+    """Outcome of adding one scan record, kept for printing after all adds finish."""
+    index: int
+    type_name: str
+    name: str
+    value: str
+    resp: Optional[dict]
+    error: Optional[str]
 
 
 def extract_scan_results(scan_file):
     """Extract JSON scan results from curl log file."""
-    with open(scan_file, 'r') as f:
-        lines = f.readlines()
-
-    # Find the line with JSON (starts with {" and doesn't have curl markers)
+    # Stream the log and stop at the first line that looks like the scan JSON.
+    # Curl verbose markers ('*', '>', '<', '{ [n bytes data]') never match.
     json_line = None
-    for line in lines:
-        # Skip curl verbose output lines
-        if line.startswith(('*', '>', '<', '{', '}')):
-            continue
-        # Look for line that looks like JSON
-        if line.strip().startswith('{"JobId"'):
-            json_line = line
-            break
-
-    # If not found, try the last line (curl sometimes puts JSON at the end)
-    if not json_line:
-        for line in reversed(lines):
+    with open(scan_file, 'r') as f:
+        for line in f:
             stripped = line.strip()
             if stripped.startswith('{"JobId"'):
                 json_line = stripped
@@ -48,41 +76,89 @@ def extract_scan_results(scan_file):
         print(f"❌ Could not find JSON in {scan_file}")
         return None
 
-    # Extract just the JSON object by counting braces
     start_idx = json_line.find('{"JobId"')
     if start_idx == -1:
         print(f"❌ Could not find JSON start in line")
         return None
 
-    json_line = json_line[start_idx:]
-
-    # Find the matching closing brace
-    brace_count = 0
-    end_idx = 0
-    for i, char in enumerate(json_line):
-        if char == '{':
-            brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                end_idx = i + 1
-                break
-
-    if end_idx == 0:
-        print(f"❌ Could not find JSON end")
-        return None
-
-    json_str = json_line[:end_idx]
-
+    # Decode just the JSON object; raw_decode stops at its closing brace and
+    # ignores trailing curl output (e.g. a -w status code)
     try:
-        data = json.loads(json_str)
+        data, _ = SCAN_DECODER.raw_decode(json_line, start_idx)
         return data
     except json.JSONDecodeError as e:
         print(f"❌ Failed to parse JSON: {e}")
-        print(f"   JSON length: {len(json_str)} chars")
+        print(f"   JSON length: {len(json_line) - start_idx} chars")
         return None
 
 
+def get_connection(api_url):
+    """Return this thread's keep-alive connection to the API host, opening it on first use.
+
+    Honours HTTP(S)_PROXY / NO_PROXY like the curl call this replaced: when a
+    proxy applies, the connection goes to the proxy and tunnels to the API
+    host with CONNECT.
+    """
+    url = urlsplit(api_url)
+    if not hasattr(_local, 'connections'):
+        _local.connections = {}
+    conn = _local.connections.get(url.netloc)
+    if conn is None:
+        if url.scheme == 'http':
+            conn_cls = http.client.HTTPConnection
+        else:
+            conn_cls = http.client.HTTPSConnection
+
+        proxy = None if proxy_bypass(url.hostname) else getproxies().get(url.scheme)
+        if proxy:
+            proxy_url = urlsplit(proxy if '://' in proxy else f'http://{proxy}')
+            tunnel_headers = {}
+            if proxy_url.username:
+                credentials = f"{unquote(proxy_url.username)}:{unquote(proxy_url.password or '')}"
+                tunnel_headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(credentials.encode()).decode()
+            conn = conn_cls(proxy_url.hostname, proxy_url.port or 80, timeout=10)
+            conn.set_tunnel(url.hostname, url.port, headers=tunnel_headers)
+        else:
+            conn = conn_cls(url.netloc, timeout=10)
+        _local.connections[url.netloc] = conn
+    return conn
+
+
+def get_http2_client():
+    """Return the shared HTTP/2 client, creating it on first use."""
+    global _http2_client
+    with _http2_lock:
+        if _http2_client is None:
+            _http2_client = httpx.Client(http2=True, timeout=10)
+        return _http2_client
+
+
+def put_json(api_url, path, payload, api_key):
+    """PUT a JSON payload to the API; returns (response body, error)."""
+    body = json.dumps(payload)
+    headers = {
+        'AccessKey': api_key,
+        'Content-Type': 'application/json',
+    }
+
+    if httpx is not None:
+        try:
+            resp = get_http2_client().put(f"{api_url.rstrip('/')}{path}", content=body, headers=headers)
+        except httpx.HTTPError as e:
+            return None, f"Request failed: {str(e)[:100]}"
+        return resp.text, None
+
+    # Fall back to this thread's HTTP/1.1 keep-alive connection
+    conn = get_connection(api_url)
+    try:
+        conn.request('PUT', urlsplit(api_url).path.rstrip('/') + path, body=body, headers=headers)
+        return conn.getresponse().read().decode('utf-8', 'replace'), None
+    except (OSError, http.client.HTTPException) as e:
+        # Drop the broken connection; the next request reconnects
+        conn.close()
+        return None, f"Request failed: {str(e)[:100]}"
+
+
 def add_record(zone_id, record, api_key, api_url):
     """Add a single record to the zone via API."""
     # Convert scan record to AddRecordRequest format
@@ -100,23 +176,15 @@ def add_record(zone_id, record, api_key, api_url):
         "Comment": "Added from DNS scan"
     }
 
-    # Call API via curl
-    result = subprocess.run([
-        'curl', '-s', '-X', 'PUT',
-        '-H', f'AccessKey: {api_key}',
-        '-H', 'Content-Type: application/json',
-        '-d', json.dumps(add_req),
-        f'{api_url}/dnszone/{zone_id}/records'
-    ], capture_output=True, text=True)
-
-    if result.returncode != 0:
-        return None, f"curl failed: {result.stderr[:100]}"
+    body, error = put_json(api_url, f'/dnszone/{zone_id}/records', add_req, api_key)
+    if error:
+        return None, error
 
     try:
-        resp = json.loads(result.stdout)
+        resp = json.loads(body)
         return resp, None
     except json.JSONDecodeError:
-        return None, f"Invalid JSON response: {result.stdout[:100]}"
+        return None, f"Invalid JSON response: {body[:100]}"
 
 
 def main():
@@ -155,26 +223,49 @@ def main():
     error_count = 0
 
     type_names = {0: 'A', 1: 'AAAA', 2: 'CNAME', 3: 'TXT', 4: 'MX', 8: 'SRV'}
-
-    for i, record in enumerate(records[:max_records]):
-        type_name = type_names.get(record['Type'], f"Type{record['Type']}")
-        name = record.get('Name', '@')
-        value = record['Value'][:40] + '...' if len(record['Value']) > 40 else record['Value']
-
-        print(f"  {i+1}. {type_name:6s} {name:20s} -> {value}")
-
-        resp, error = add_record(zone_id, record, api_key, api_url)
-
-        if error:
-            print(f"     ❌ Failed: {error}")
+    type_name_get = type_names.get
+
+    def submit(i, record):
+        # Never raise: a failure here would hide every other record's outcome,
+        # including ones already created on the API
+        record_type = record.get('Type')
+        value = str(record.get('Value', ''))
+        if len(value) > 40:
+            value = value[:40] + '...'
+        try:
+            resp, error = add_record(zone_id, record, api_key, api_url)
+        except Exception as e:
+            resp, error = None, f"{type(e).__name__}: {str(e)[:100]}"
+        return AddResult(
+            index=i,
+            type_name=type_name_get(record_type) or f"Type{record_type}",
+            name=record.get('Name', '@'),
+            value=value,
+            resp=resp,
+            error=error,
+        )
+
+    # Workers only make the API calls; all output happens after they finish.
+    # ex.map yields results in record order, whatever order they complete in.
+    batch = records[:max_records]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        results = list(ex.map(submit, range(len(batch)), batch))
+
+    for result in results:
+        out = [f"  {result.index+1}. {result.type_name:6s} {result.name:20s} -> {result.value}"]
+
+        if result.error:
+            out.append(f"     ❌ Failed: {result.error}")
             error_count += 1
-        elif resp and resp.get('Id'):
-            print(f"     ✅ Created record ID: {resp['Id']}")
+        elif result.resp and result.resp.get('Id'):
+            out.append(f"     ✅ Created record ID: {result.resp['Id']}")
             success_count += 1
         else:
-            print(f"     ⚠️  Unexpected response: {resp}")
+            out.append(f"     ⚠️  Unexpected response: {result.resp}")
             error_count += 1
 
+        sys.stdout.write('\n'.join(out) + '\n')
+
     print()
     print(f"Summary: {success_count} added, {error_count} failed")
 